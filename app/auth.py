@@ -1,18 +1,77 @@
 from __future__ import annotations
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 import bcrypt
+import orjson
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from cachetools import TTLCache
 from itsdangerous import URLSafeSerializer, BadSignature
 from fastapi import Request, Response
-from .config import SECRET_KEY
+from .config import get_settings
 
-serializer = URLSafeSerializer(SECRET_KEY, salt="session")
+settings = get_settings()
+
+class _OrjsonSerializer:
+    # Same compact JSON as itsdangerous' default, so existing cookies stay valid
+    @staticmethod
+    def dumps(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    @staticmethod
+    def loads(data):
+        return orjson.loads(data)
+
+serializer = URLSafeSerializer(settings.secret_key, salt="session", serializer=_OrjsonSerializer)
 
 COOKIE_NAME = "hive_food_session"
 
+# Argon2id, by default with 64 MiB / t=2 / p=2 (RFC 9106 low-memory profile). Legacy bcrypt
+# hashes are still accepted and get rehashed on the next successful login.
+password_hasher = PasswordHasher(
+    time_cost=settings.argon2_time_cost,
+    memory_cost=settings.argon2_memory_cost,
+    parallelism=settings.argon2_parallelism,
+)
+
+# user_id -> User, so authenticated requests skip the per-request SELECT.
+# Entries are dropped when that user changes, but only in this process; the short TTL
+# bounds how long other workers keep a revoked is_admin. cachetools caches are not thread-safe.
+_user_cache: TTLCache = TTLCache(maxsize=10000, ttl=5)
+_user_cache_lock = threading.Lock()
+
+# Signed cookie -> user_id. The serializer is deterministic, so a token that
+# verified once keeps verifying; this skips HMAC + base64 + JSON on repeat hits.
+_token_cache: TTLCache = TTLCache(maxsize=10000, ttl=60 * 60)
+_token_cache_lock = threading.Lock()
+
+def _is_bcrypt_hash(password_hash: str) -> bool:
+    return password_hash.startswith(("$2a$", "$2b$", "$2y$"))
+
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return password_hasher.hash(password)
 
 def verify_password(password: str, password_hash: str) -> bool:
-    return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
+    if _is_bcrypt_hash(password_hash):
+        return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
+    try:
+        return password_hasher.verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+def bulk_hash(passwords: list[str]) -> list[str]:
+    """Hash many passwords at once (user seeding/imports), one process per core."""
+    if len(passwords) < 2:
+        return [hash_password(p) for p in passwords]
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        return list(pool.map(hash_password, passwords))
+
+def password_needs_rehash(password_hash: str) -> bool:
+    if _is_bcrypt_hash(password_hash):
+        return True
+    return password_hasher.check_needs_rehash(password_hash)
 
 def set_login_cookie(response: Response, user_id: int) -> None:
     token = serializer.dumps({"user_id": user_id})
@@ -32,8 +91,31 @@ def get_user_id_from_request(request: Request) -> int | None:
     token = request.cookies.get(COOKIE_NAME)
     if not token:
         return None
+    key = _token_key(token)
+    with _token_cache_lock:
+        user_id = _token_cache.get(key)
+    if user_id is not None:
+        return user_id
     try:
         data = serializer.loads(token)
-        return int(data.get("user_id"))
+        user_id = int(data.get("user_id"))
     except (BadSignature, Exception):
         return None
+    with _token_cache_lock:
+        _token_cache[key] = user_id
+    return user_id
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def get_cached_user(user_id: int):
+    with _user_cache_lock:
+        return _user_cache.get(user_id)
+
+def cache_user(user) -> None:
+    with _user_cache_lock:
+        _user_cache[user.id] = user
+
+def forget_cached_user(user_id: int) -> None:
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
@@ -1,15 +1,65 @@
 from __future__ import annotations
 import os
+from dataclasses import dataclass
+from functools import lru_cache
 from dotenv import load_dotenv
 
-load_dotenv()
+def _env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes")
 
-APP_NAME = os.getenv("APP_NAME", "HIVE Food Coordinator")
-SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-change-me")
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./hive_food.db")
+@dataclass(frozen=True, slots=True)
+class Settings:
+    app_name: str
+    secret_key: str
+    database_url: str
+    # Connections kept open per process, plus extra ones allowed under bursts. On a server
+    # database, (pool size + overflow) x gunicorn workers must stay below its connection limit.
+    db_pool_size: int
+    db_max_overflow: int
 
-# Comma-separated list of email domains permitted to register
-ALLOWED_EMAIL_DOMAINS = [d.strip().lower() for d in os.getenv("ALLOWED_EMAIL_DOMAINS", "").split(",") if d.strip()]
+    # Re-read templates from disk when they change; enable for local development
+    template_auto_reload: bool
+    # Where compiled template bytecode is kept across restarts (system temp dir if unset)
+    jinja_cache_dir: str | None
 
-ADMIN_BOOTSTRAP_EMAIL = os.getenv("ADMIN_BOOTSTRAP_EMAIL", "admin@hive-gp.de").lower()
-ADMIN_BOOTSTRAP_PASSWORD = os.getenv("ADMIN_BOOTSTRAP_PASSWORD", "ChangeMe123!")
+    # Comma-separated list of email domains permitted to register
+    allowed_email_domains: frozenset[str]
+
+    admin_bootstrap_email: str
+    admin_bootstrap_password: str
+
+    # Argon2id password hashing cost (memory in KiB). Hashes made with other
+    # parameters are upgraded on the user's next login.
+    argon2_time_cost: int
+    argon2_memory_cost: int
+    argon2_parallelism: int
+    # Password hashes/verifies allowed to run at once per process. Each Argon2 call holds
+    # argon2_memory_cost (64 MiB by default), so this caps hashing memory at N x 64 MiB.
+    hash_concurrency: int
+
+    # Worker threads available to sync routes and run_in_threadpool calls
+    threadpool_size: int
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Read .env and the environment once; every later call returns the same object."""
+    load_dotenv()
+    return Settings(
+        app_name=os.getenv("APP_NAME", "HIVE Food Coordinator"),
+        secret_key=os.getenv("SECRET_KEY", "dev-secret-change-me"),
+        database_url=os.getenv("DATABASE_URL", "sqlite:///./hive_food.db"),
+        db_pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+        db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        template_auto_reload=_env_flag("TEMPLATE_AUTO_RELOAD"),
+        jinja_cache_dir=os.getenv("JINJA_CACHE_DIR") or None,
+        allowed_email_domains=frozenset(
+            d.strip().lower() for d in os.getenv("ALLOWED_EMAIL_DOMAINS", "").split(",") if d.strip()
+        ),
+        admin_bootstrap_email=os.getenv("ADMIN_BOOTSTRAP_EMAIL", "admin@hive-gp.de").lower(),
+        admin_bootstrap_password=os.getenv("ADMIN_BOOTSTRAP_PASSWORD", "ChangeMe123!"),
+        argon2_time_cost=int(os.getenv("ARGON2_TIME_COST", "2")),
+        argon2_memory_cost=int(os.getenv("ARGON2_MEMORY_COST", str(64 * 1024))),
+        argon2_parallelism=int(os.getenv("ARGON2_PARALLELISM", "2")),
+        hash_concurrency=int(os.getenv("HASH_CONCURRENCY", "2")),
+        threadpool_size=int(os.getenv("THREADPOOL_SIZE", "64")),
+    )
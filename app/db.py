@@ -1,12 +1,57 @@
 from __future__ import annotations
+from typing import Iterator
+from sqlalchemy import event, make_url, text
+from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel, create_engine, Session
-from .config import DATABASE_URL
+from .config import get_settings
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args)
+settings = get_settings()
+
+connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
+url = make_url(settings.database_url)
+pool_args = {}
+if url.get_backend_name() != "sqlite":
+    pool_args["pool_pre_ping"] = True  # replace connections the server dropped while idle
+if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+    # room for many more concurrent requests than the default 5 + 10; threads beyond the pool
+    # wait for a connection. In-memory SQLite uses SingletonThreadPool, which takes no sizing.
+    pool_args.update(pool_size=settings.db_pool_size, max_overflow=settings.db_max_overflow)
+engine = create_engine(settings.database_url, echo=False, connect_args=connect_args, **pool_args)
+# expire_on_commit=False keeps loaded objects usable after commit without a reload
+SessionLocal = sessionmaker(bind=engine, class_=Session, expire_on_commit=False)
+
+if settings.database_url.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        # WAL lets readers run alongside a writer; NORMAL skips an fsync per commit
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        # bigger page cache (64 MiB, negative = KiB), in-memory temp tables for sorts,
+        # and memory-mapped reads; sqlite3's default 5s timeout already covers busy_timeout
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.close()
 
 def init_db() -> None:
     SQLModel.metadata.create_all(engine)
+    # create_all() skips tables that already exist, so add any newer indexes explicitly
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    with engine.begin() as conn:
+        # superseded by the (session_id, created_at) and (restaurant_id, name) composite indexes
+        conn.execute(text("DROP INDEX IF EXISTS ix_orderitem_session_id"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_menuitem_restaurant_id"))
 
 def get_session() -> Session:
-    return Session(engine)
+    return SessionLocal()
+
+def get_db() -> Iterator[Session]:
+    """FastAPI dependency: one session per request, closed once the handler is done."""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -3,91 +3,228 @@ from __future__ import annotations
 from datetime import datetime
 from io import StringIO
 import csv
-
-from fastapi import FastAPI, Request, Form, Depends
-from fastapi.responses import HTMLResponse, RedirectResponse, Response, PlainTextResponse
+from functools import lru_cache
+import hashlib
+import itertools
+from operator import attrgetter
+import os
+import threading
+from urllib.parse import parse_qs, quote_plus
+
+import anyio.to_thread
+from cachetools import TTLCache
+
+from fastapi import FastAPI, Request, Form, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
-from sqlmodel import select
+from sqlalchemy import String, and_, case, cast, exists, func, literal, literal_column, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import contains_eager, selectinload
+from sqlmodel import Session, select
 
-from .config import APP_NAME, ALLOWED_EMAIL_DOMAINS, ADMIN_BOOTSTRAP_EMAIL, ADMIN_BOOTSTRAP_PASSWORD
-from .db import init_db, get_session
+from .config import get_settings
+from .db import init_db, get_session, get_db
 from .models import User, OrderSession, OrderItem, Restaurant, MenuItem
-from .auth import hash_password, verify_password, set_login_cookie, clear_login_cookie, get_user_id_from_request
-from .utils import now_utc, fmt_dt, euro
-
-app = FastAPI(title=APP_NAME)
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
-templates = Jinja2Templates(directory="app/templates")
-templates.env.globals.update(app_name=APP_NAME, fmt_dt=fmt_dt, euro=euro)
+from .auth import (
+    hash_password, verify_password, password_needs_rehash, set_login_cookie, clear_login_cookie, get_user_id_from_request,
+    get_cached_user, cache_user, forget_cached_user,
+)
+from .utils import now_utc, fmt_dt, euro, parse_price, parse_deadline
+
+settings = get_settings()
+# email lookups only need a column or two, so they run as Core selects against the table
+user_table = User.__table__
+
+app = FastAPI(title=settings.app_name, default_response_class=HTMLResponse)
+STATIC_DIR = "app/static"
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that tells browsers how long they may keep an asset.
+
+    URLs produced by static_url() carry a ?v=<content hash>, so those can be cached
+    for a year; anything else is revalidated (ETag / Last-Modified) on each use.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        if "v" in parse_qs(scope.get("query_string", b"").decode("latin-1")):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "public, no-cache"
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+@lru_cache(maxsize=64)
+def static_url(path: str) -> str:
+    # content hash rather than mtime, so every worker and every deploy of the same file agree
+    if settings.template_auto_reload:
+        return f"/static/{path}"  # development: assets are edited in place, don't pin them
+    with open(os.path.join(STATIC_DIR, path), "rb") as f:
+        digest = hashlib.blake2b(f.read(), digest_size=6).hexdigest()
+    return f"/static/{path}?v={digest}"
+
+app.mount("/static", CachedStaticFiles(directory=STATIC_DIR), name="static")
+# Compiled templates are kept in a bytecode cache so restarts and new workers skip
+# parsing; auto_reload (a stat per render) is only wanted while editing templates.
+if settings.jinja_cache_dir:
+    os.makedirs(settings.jinja_cache_dir, exist_ok=True)
+templates = Jinja2Templates(env=Environment(
+    loader=FileSystemLoader("app/templates"),
+    autoescape=True,
+    auto_reload=settings.template_auto_reload,
+    bytecode_cache=FileSystemBytecodeCache(settings.jinja_cache_dir),
+    cache_size=400,
+))
+templates.env.globals.update(app_name=settings.app_name, fmt_dt=fmt_dt, euro=euro, static_url=static_url)
+
+# Fixed, header-less bodies for HTMX partials; responses aren't mutated once sent, so one
+# instance each can be returned from every request.
+_EMPTY_RESPONSE = HTMLResponse("")
+_UNAUTHORIZED_RESPONSE = HTMLResponse("", status_code=401)
 
 def flash(request: Request) -> dict | None:
     # simple flash via query params ?ok=... or ?err=...
-    if request.query_params.get("ok"):
-        return {"kind": "ok", "message": request.query_params["ok"]}
-    if request.query_params.get("err"):
-        return {"kind": "error", "message": request.query_params["err"]}
+    params = request.query_params
+    if message := params.get("ok"):
+        return {"kind": "ok", "message": message}
+    if message := params.get("err"):
+        return {"kind": "error", "message": message}
+    return None
+
+@lru_cache(maxsize=256)
+def _redirect_url(path: str, kind: str | None, message: str | None, fragment: str | None) -> str:
+    url = path
+    if kind:
+        url += f"?{kind}={quote_plus(message)}"
+    if fragment:
+        url += f"#{fragment}"
+    return url
+
+def redirect(path: str, *, ok: str | None = None, err: str | None = None, fragment: str | None = None) -> RedirectResponse:
+    # URLs are encoded once per distinct (path, message); the response itself is built
+    # fresh every time because callers such as login/logout set cookies on it
+    kind, message = ("ok", ok) if ok else ("err", err) if err else (None, None)
+    return RedirectResponse(_redirect_url(path, kind, message, fragment), status_code=302)
+
+def make_etag(*parts) -> str:
+    """Weak ETag from the values a fragment's content depends on."""
+    return 'W/"' + hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest() + '"'
+
+def not_modified(request: Request, etag: str, cache_control: str) -> Response | None:
+    # the client already holds this version: answer 304 without querying rows or rendering
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
     return None
 
 def ensure_bootstrap_admin() -> None:
     with get_session() as session:
-        existing = session.exec(select(User).where(User.email == ADMIN_BOOTSTRAP_EMAIL)).first()
-        if not existing:
+        exists_already = session.exec(
+            select(exists().where(user_table.c.email == settings.admin_bootstrap_email))
+        ).one()
+        if not exists_already:
             admin = User(
-                email=ADMIN_BOOTSTRAP_EMAIL,
+                email=settings.admin_bootstrap_email,
                 full_name="HIVE Manager (bootstrap)",
-                password_hash=hash_password(ADMIN_BOOTSTRAP_PASSWORD),
+                password_hash=hash_password(settings.admin_bootstrap_password),
                 is_admin=True,
             )
             session.add(admin)
             session.commit()
 
-@app.on_event("startup")
-def on_startup() -> None:
+def warm_templates() -> None:
+    # compile every template up front so the first request doesn't pay for it
+    for name in templates.env.list_templates():
+        templates.env.get_template(name)
+
+_bootstrapped = False
+
+def bootstrap() -> None:
+    """Create tables, the bootstrap admin and compiled templates, once per process tree.
+
+    gunicorn calls this in the master before forking (see gunicorn_conf.py), so workers
+    inherit the result and don't race each other on schema creation; under plain uvicorn
+    the startup hook below does it instead.
+    """
+    global _bootstrapped
+    if _bootstrapped:
+        return
     init_db()
     ensure_bootstrap_admin()
+    warm_templates()
+    _bootstrapped = True
+
+@app.on_event("startup")
+def on_startup() -> None:
+    # sync routes and DB helpers share anyio's default thread limiter, raised here from 40;
+    # password hashing has its own smaller one (_hash_limiter). Both need a running event
+    # loop on anyio < 4.2, so they are set up here rather than at import (preload_app).
+    global _hash_limiter
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
+    _hash_limiter = anyio.CapacityLimiter(settings.hash_concurrency)
+    bootstrap()
 
 def get_current_user(request: Request) -> User | None:
+    # resolved at most once per request; later calls reuse request.state
+    if hasattr(request.state, "user"):
+        return request.state.user
+    request.state.user = user = _load_current_user(request)
+    return user
+
+def _load_current_user(request: Request) -> User | None:
     uid = get_user_id_from_request(request)
     if not uid:
         return None
+    user = get_cached_user(uid)
+    if user is not None:
+        return user
     with get_session() as session:
-        return session.get(User, uid)
+        user = session.get(User, uid)
+    if user:
+        cache_user(user)
+    return user
 
 def require_user(request: Request) -> User:
     user = get_current_user(request)
     if not user:
-        raise_redirect = RedirectResponse(url="/login?err=Please+log+in", status_code=302)
+        raise_redirect = redirect("/login", err="Please log in")
         # FastAPI expects an exception, but easiest is to return response from routes; here we raise.
         # We'll handle by raising RuntimeError and catching? Simpler: in each route do manual checks.
         raise RuntimeError("AUTH_REQUIRED")
     return user
 
 def email_domain_ok(email: str) -> bool:
-    if not ALLOWED_EMAIL_DOMAINS:
+    if not settings.allowed_email_domains:
         return True
-    parts = email.lower().split("@")
-    if len(parts) != 2:
-        return False
-    return parts[1] in ALLOWED_EMAIL_DOMAINS
-
-def is_session_editable(s: OrderSession) -> bool:
-    if s.status != "open":
-        return False
-    return now_utc() <= s.deadline_at
-
-@app.get("/", response_class=HTMLResponse)
-def dashboard(request: Request):
+    local, sep, domain = email.rpartition("@")
+    return bool(sep) and "@" not in local and domain.lower() in settings.allowed_email_domains
+
+def session_and_editable(session, session_id: int) -> tuple[OrderSession | None, bool]:
+    """Fetch an order session together with whether items may still be changed."""
+    # open and not past the deadline, evaluated by the database in the same SELECT
+    editable = and_(OrderSession.status == "open", OrderSession.deadline_at >= now_utc()).label("editable")
+    row = session.exec(select(OrderSession, editable).where(OrderSession.id == session_id)).first()
+    if row is None:
+        return None, False
+    return row[0], bool(row.editable)
+
+@app.get("/")
+def dashboard(request: Request, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user:
-        return RedirectResponse("/login", status_code=302)
+        return redirect("/login")
 
-    with get_session() as session:
-        if user.is_admin:
-            sessions = session.exec(select(OrderSession).order_by(OrderSession.created_at.desc())).all()
-        else:
-            sessions = session.exec(select(OrderSession).order_by(OrderSession.created_at.desc())).all()
+    if user.is_admin:
+        sessions = session.exec(select(OrderSession).order_by(OrderSession.created_at.desc())).all()
+    else:
+        sessions = session.exec(select(OrderSession).order_by(OrderSession.created_at.desc())).all()
 
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
@@ -96,79 +233,102 @@ def dashboard(request: Request):
         "flash": flash(request),
     })
 
-@app.get("/login", response_class=HTMLResponse)
+@app.get("/login")
 def login_page(request: Request):
     return templates.TemplateResponse("login.html", {"request": request, "current_user": None, "flash": flash(request)})
 
+# Every Argon2 hash/verify allocates argon2_memory_cost, so password work gets its own small
+# limiter instead of the 64-thread default one; extra logins wait rather than exhaust memory.
+# Created in on_startup.
+_hash_limiter: anyio.CapacityLimiter | None = None
+
+async def run_hashing(func, *args):
+    return await anyio.to_thread.run_sync(func, *args, limiter=_hash_limiter)
+
+def authenticate(email: str, password: str) -> int | None:
+    with get_session() as session:
+        row = session.exec(
+            select(user_table.c.id, user_table.c.password_hash).where(user_table.c.email == email)
+        ).first()
+        if not row or not verify_password(password, row.password_hash):
+            return None
+        if password_needs_rehash(row.password_hash):
+            # transparently migrate bcrypt / outdated Argon2 hashes
+            session.exec(update(user_table).where(user_table.c.id == row.id).values(password_hash=hash_password(password)))
+            session.commit()
+    return row.id
+
 @app.post("/login")
-def login(request: Request, email: str = Form(...), password: str = Form(...)):
+async def login(request: Request, email: str = Form(...), password: str = Form(...)):
+    # Hashing is CPU-bound and releases the GIL, so run it (and the lookup) off the event loop.
     email = email.strip().lower()
-    with get_session() as session:
-        user = session.exec(select(User).where(User.email == email)).first()
-        if not user or not verify_password(password, user.password_hash):
-            return RedirectResponse("/login?err=Invalid+credentials", status_code=302)
+    user_id = await run_hashing(authenticate, email, password)
+    if not user_id:
+        return redirect("/login", err="Invalid credentials")
 
-    response = RedirectResponse("/", status_code=302)
-    set_login_cookie(response, user.id)
+    response = redirect("/")
+    set_login_cookie(response, user_id)
     return response
 
 @app.get("/logout")
-def logout():
-    response = RedirectResponse("/login?ok=Logged+out", status_code=302)
+def logout(request: Request):
+    response = redirect("/login", ok="Logged out")
     clear_login_cookie(response)
     return response
 
 # ---- Change password ----
 
-@app.get("/change-password", response_class=HTMLResponse)
+@app.get("/change-password")
 def change_password_page(request: Request):
     user = get_current_user(request)
     if not user:
-        return RedirectResponse("/login?err=Please+log+in", status_code=302)
+        return redirect("/login", err="Please log in")
     return templates.TemplateResponse("change_password.html", {
         "request": request,
         "current_user": user,
         "flash": flash(request),
     })
 
+def set_password(user_id: int, password: str) -> None:
+    password_hash = hash_password(password)
+    with get_session() as session:
+        session.exec(update(User).where(User.id == user_id).values(password_hash=password_hash))
+        session.commit()
+
 @app.post("/change-password")
-def change_password(
+async def change_password(
     request: Request,
     current_password: str = Form(...),
     new_password: str = Form(...),
     confirm_password: str = Form(...),
 ):
-    user = get_current_user(request)
+    user = await run_in_threadpool(get_current_user, request)
     if not user:
-        return RedirectResponse("/login?err=Please+log+in", status_code=302)
+        return redirect("/login", err="Please log in")
 
-    if not verify_password(current_password, user.password_hash):
-        return RedirectResponse("/change-password?err=Current+password+is+incorrect", status_code=302)
+    if not await run_hashing(verify_password, current_password, user.password_hash):
+        return redirect("/change-password", err="Current password is incorrect")
 
     if len(new_password) < 8:
-        return RedirectResponse("/change-password?err=New+password+must+be+at+least+8+characters", status_code=302)
+        return redirect("/change-password", err="New password must be at least 8 characters")
 
     if new_password != confirm_password:
-        return RedirectResponse("/change-password?err=New+passwords+do+not+match", status_code=302)
+        return redirect("/change-password", err="New passwords do not match")
 
-    with get_session() as session:
-        db_user = session.get(User, user.id)
-        db_user.password_hash = hash_password(new_password)
-        session.add(db_user)
-        session.commit()
+    await run_hashing(set_password, user.id, new_password)
+    forget_cached_user(user.id)
 
-    return RedirectResponse("/?ok=Password+changed+successfully", status_code=302)
+    return redirect("/", ok="Password changed successfully")
 
 # ---- Admin user management ----
 
-@app.get("/admin/users", response_class=HTMLResponse)
-def admin_users_page(request: Request):
+@app.get("/admin/users")
+def admin_users_page(request: Request, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user or not user.is_admin:
-        return RedirectResponse("/?err=Admin+access+required", status_code=302)
+        return redirect("/", err="Admin access required")
 
-    with get_session() as session:
-        users = session.exec(select(User).order_by(User.full_name)).all()
+    users = session.exec(select(User).order_by(User.full_name)).all()
 
     return templates.TemplateResponse("admin_users.html", {
         "request": request,
@@ -177,88 +337,91 @@ def admin_users_page(request: Request):
         "flash": flash(request),
     })
 
+def create_user(email: str, full_name: str, password: str, is_admin: bool) -> bool:
+    with get_session() as session:
+        if session.exec(select(exists().where(user_table.c.email == email))).one():
+            return False
+        new_user = User(
+            email=email,
+            full_name=full_name,
+            password_hash=hash_password(password),
+            is_admin=is_admin,
+        )
+        session.add(new_user)
+        session.commit()
+    return True
+
 @app.post("/admin/users/new")
-def admin_create_user(
+async def admin_create_user(
     request: Request,
     full_name: str = Form(...),
     email: str = Form(...),
     password: str = Form(...),
     is_admin: bool = Form(False),
 ):
-    user = get_current_user(request)
+    user = await run_in_threadpool(get_current_user, request)
     if not user or not user.is_admin:
-        return RedirectResponse("/?err=Admin+access+required", status_code=302)
+        return redirect("/", err="Admin access required")
 
     email = email.strip().lower()
     full_name = full_name.strip()
     if len(password) < 8:
-        return RedirectResponse("/admin/users?err=Password+must+be+at+least+8+characters", status_code=302)
+        return redirect("/admin/users", err="Password must be at least 8 characters")
     if not email_domain_ok(email):
-        return RedirectResponse("/admin/users?err=Email+domain+not+allowed", status_code=302)
+        return redirect("/admin/users", err="Email domain not allowed")
 
-    with get_session() as session:
-        existing = session.exec(select(User).where(User.email == email)).first()
-        if existing:
-            return RedirectResponse("/admin/users?err=Account+already+exists", status_code=302)
-        new_user = User(
-            email=email,
-            full_name=full_name,
-            password_hash=hash_password(password),
-            is_admin=is_admin,
-        )
-        session.add(new_user)
-        session.commit()
+    if not await run_hashing(create_user, email, full_name, password, is_admin):
+        return redirect("/admin/users", err="Account already exists")
 
-    return RedirectResponse("/admin/users?ok=User+created", status_code=302)
+    return redirect("/admin/users", ok="User created")
 
 @app.post("/admin/users/{target_user_id}/delete")
-def admin_delete_user(request: Request, target_user_id: int):
+def admin_delete_user(request: Request, target_user_id: int, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user or not user.is_admin:
-        return RedirectResponse("/?err=Admin+access+required", status_code=302)
+        return redirect("/", err="Admin access required")
     if target_user_id == user.id:
-        return RedirectResponse("/admin/users?err=Cannot+delete+yourself", status_code=302)
+        return redirect("/admin/users", err="Cannot delete yourself")
 
-    with get_session() as session:
-        target = session.get(User, target_user_id)
-        if not target:
-            return RedirectResponse("/admin/users?err=User+not+found", status_code=302)
-        session.delete(target)
-        session.commit()
+    target = session.get(User, target_user_id)
+    if not target:
+        return redirect("/admin/users", err="User not found")
+    session.delete(target)
+    session.commit()
+    forget_cached_user(target_user_id)
 
-    return RedirectResponse("/admin/users?ok=User+deleted", status_code=302)
+    return redirect("/admin/users", ok="User deleted")
 
 @app.post("/admin/users/{target_user_id}/toggle-admin")
-def admin_toggle_admin(request: Request, target_user_id: int):
+def admin_toggle_admin(request: Request, target_user_id: int, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user or not user.is_admin:
-        return RedirectResponse("/?err=Admin+access+required", status_code=302)
+        return redirect("/", err="Admin access required")
     if target_user_id == user.id:
-        return RedirectResponse("/admin/users?err=Cannot+change+your+own+admin+status", status_code=302)
+        return redirect("/admin/users", err="Cannot change your own admin status")
 
-    with get_session() as session:
-        target = session.get(User, target_user_id)
-        if not target:
-            return RedirectResponse("/admin/users?err=User+not+found", status_code=302)
-        target.is_admin = not target.is_admin
-        session.add(target)
-        session.commit()
+    target = session.get(User, target_user_id)
+    if not target:
+        return redirect("/admin/users", err="User not found")
+    target.is_admin = not target.is_admin
+    session.add(target)
+    session.commit()
+    forget_cached_user(target_user_id)
 
-    return RedirectResponse("/admin/users?ok=Admin+status+toggled", status_code=302)
+    return redirect("/admin/users", ok="Admin status toggled")
 
 # ---- Admin restaurant & menu management ----
 
-@app.get("/admin/restaurants", response_class=HTMLResponse)
-def admin_restaurants_page(request: Request):
+@app.get("/admin/restaurants")
+def admin_restaurants_page(request: Request, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user or not user.is_admin:
-        return RedirectResponse("/?err=Admin+access+required", status_code=302)
+        return redirect("/", err="Admin access required")
 
-    with get_session() as session:
-        restaurants = session.exec(select(Restaurant).order_by(Restaurant.name)).all()
-        # eager-load menu items
-        for r in restaurants:
-            _ = r.menu_items
+    # one extra IN query for all menus instead of a lazy load per restaurant
+    restaurants = session.exec(
+        select(Restaurant).options(selectinload(Restaurant.menu_items)).order_by(Restaurant.name)
+    ).all()
 
     return templates.TemplateResponse("admin_restaurants.html", {
         "request": request,
@@ -272,39 +435,38 @@ def admin_create_restaurant(
     request: Request,
     name: str = Form(...),
     url: str = Form(""),
+    session: Session = Depends(get_db),
 ):
     user = get_current_user(request)
     if not user or not user.is_admin:
-        return RedirectResponse("/?err=Admin+access+required", status_code=302)
+        return redirect("/", err="Admin access required")
 
     name = name.strip()
     if not name:
-        return RedirectResponse("/admin/restaurants?err=Name+is+required", status_code=302)
+        return redirect("/admin/restaurants", err="Name is required")
 
-    with get_session() as session:
-        existing = session.exec(select(Restaurant).where(Restaurant.name == name)).first()
-        if existing:
-            return RedirectResponse("/admin/restaurants?err=Restaurant+already+exists", status_code=302)
-        r = Restaurant(name=name, url=(url.strip() or None))
-        session.add(r)
-        session.commit()
+    if session.exec(select(exists().where(Restaurant.name == name))).one():
+        return redirect("/admin/restaurants", err="Restaurant already exists")
+    r = Restaurant(name=name, url=(url.strip() or None))
+    session.add(r)
+    session.commit()
 
-    return RedirectResponse("/admin/restaurants?ok=Restaurant+created", status_code=302)
+    return redirect("/admin/restaurants", ok="Restaurant created")
 
 @app.post("/admin/restaurants/{restaurant_id}/delete")
-def admin_delete_restaurant(request: Request, restaurant_id: int):
+def admin_delete_restaurant(request: Request, restaurant_id: int, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user or not user.is_admin:
-        return RedirectResponse("/?err=Admin+access+required", status_code=302)
+        return redirect("/", err="Admin access required")
 
-    with get_session() as session:
-        r = session.get(Restaurant, restaurant_id)
-        if not r:
-            return RedirectResponse("/admin/restaurants?err=Restaurant+not+found", status_code=302)
-        session.delete(r)
-        session.commit()
+    r = session.get(Restaurant, restaurant_id)
+    if not r:
+        return redirect("/admin/restaurants", err="Restaurant not found")
+    session.delete(r)
+    session.commit()
+    forget_menu(restaurant_id)
 
-    return RedirectResponse("/admin/restaurants?ok=Restaurant+deleted", status_code=302)
+    return redirect("/admin/restaurants", ok="Restaurant deleted")
 
 @app.post("/admin/restaurants/{restaurant_id}/menu/new")
 def admin_add_menu_item(
@@ -312,81 +474,124 @@ def admin_add_menu_item(
     restaurant_id: int,
     name: str = Form(...),
     price_eur: str = Form(""),
+    session: Session = Depends(get_db),
 ):
     user = get_current_user(request)
     if not user or not user.is_admin:
-        return RedirectResponse("/?err=Admin+access+required", status_code=302)
+        return redirect("/", err="Admin access required")
 
     price_val = None
     if price_eur.strip():
         try:
-            price_val = float(price_eur)
-        except Exception:
-            return RedirectResponse(f"/admin/restaurants?err=Price+must+be+a+number", status_code=302)
+            price_val = parse_price(price_eur)
+        except ValueError:
+            return redirect("/admin/restaurants", err="Price must be a number")
 
-    with get_session() as session:
-        r = session.get(Restaurant, restaurant_id)
-        if not r:
-            return RedirectResponse("/admin/restaurants?err=Restaurant+not+found", status_code=302)
-        mi = MenuItem(restaurant_id=restaurant_id, name=name.strip(), price_eur=price_val)
-        session.add(mi)
-        session.commit()
+    r = session.get(Restaurant, restaurant_id)
+    if not r:
+        return redirect("/admin/restaurants", err="Restaurant not found")
+    mi = MenuItem(restaurant_id=restaurant_id, name=name.strip(), price_eur=price_val)
+    session.add(mi)
+    session.commit()
+    forget_menu(restaurant_id)
 
-    return RedirectResponse(f"/admin/restaurants?ok=Menu+item+added#restaurant-{restaurant_id}", status_code=302)
+    return redirect("/admin/restaurants", ok="Menu item added", fragment=f"restaurant-{restaurant_id}")
 
 @app.post("/admin/restaurants/{restaurant_id}/menu/{item_id}/delete")
-def admin_delete_menu_item(request: Request, restaurant_id: int, item_id: int):
+def admin_delete_menu_item(request: Request, restaurant_id: int, item_id: int, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user or not user.is_admin:
-        return RedirectResponse("/?err=Admin+access+required", status_code=302)
+        return redirect("/", err="Admin access required")
 
-    with get_session() as session:
-        mi = session.get(MenuItem, item_id)
-        if not mi or mi.restaurant_id != restaurant_id:
-            return RedirectResponse("/admin/restaurants?err=Menu+item+not+found", status_code=302)
-        session.delete(mi)
-        session.commit()
+    mi = session.get(MenuItem, item_id)
+    if not mi or mi.restaurant_id != restaurant_id:
+        return redirect("/admin/restaurants", err="Menu item not found")
+    session.delete(mi)
+    session.commit()
+    forget_menu(restaurant_id)
 
-    return RedirectResponse(f"/admin/restaurants?ok=Menu+item+deleted#restaurant-{restaurant_id}", status_code=302)
+    return redirect("/admin/restaurants", ok="Menu item deleted", fragment=f"restaurant-{restaurant_id}")
 
 # ---- HTMX endpoints for dropdowns ----
 
-@app.get("/api/restaurants", response_class=HTMLResponse)
-def api_restaurants_options(request: Request):
+# restaurant_id -> (fingerprint or None, menu ordered by name). Menus only change through the
+# admin pages, which drop the entry; the TTL bounds staleness in other worker processes.
+_menu_cache: TTLCache = TTLCache(maxsize=256, ttl=60)
+_menu_cache_lock = threading.Lock()
+
+def menu_fingerprint(session, restaurant_id: int) -> tuple:
+    """(count, max id, newest created_at) of a menu; changes on every add or delete."""
+    return tuple(session.exec(
+        select(func.count(MenuItem.id), func.max(MenuItem.id), func.max(MenuItem.created_at))
+        .where(MenuItem.restaurant_id == restaurant_id)
+    ).one())
+
+def menu_for_restaurant(session, restaurant_id: int, fingerprint: tuple | None = None) -> tuple[MenuItem, ...]:
+    """Cached menu of a restaurant.
+
+    The item forms pass no fingerprint and take any cached entry. The options endpoint
+    passes the fingerprint behind its ETag, so its body always matches that ETag.
+    """
+    with _menu_cache_lock:
+        entry = _menu_cache.get(restaurant_id)
+    if entry is not None and (fingerprint is None or entry[0] == fingerprint):
+        return entry[1]
+    menu = tuple(session.exec(
+        select(MenuItem).where(MenuItem.restaurant_id == restaurant_id).order_by(MenuItem.name)
+    ).all())
+    # keyed by the fingerprint read before the load: if a commit slipped in between,
+    # the next fingerprinted lookup sees a mismatch and reloads
+    with _menu_cache_lock:
+        _menu_cache[restaurant_id] = (fingerprint, menu)
+    return menu
+
+def forget_menu(restaurant_id: int) -> None:
+    with _menu_cache_lock:
+        _menu_cache.pop(restaurant_id, None)
+
+# menus change rarely; browsers may reuse a list for a while and then revalidate by ETag
+OPTIONS_CACHE_CONTROL = "private, max-age=30"
+
+@app.get("/api/restaurants")
+def api_restaurants_options(request: Request, session: Session = Depends(get_db)):
     """Return <option> tags for all restaurants."""
-    with get_session() as session:
-        restaurants = session.exec(select(Restaurant).order_by(Restaurant.name)).all()
-    html = '<option value="">-- Select a restaurant --</option>'
-    for r in restaurants:
-        html += f'<option value="{r.id}" data-url="{r.url or ""}">{r.name}</option>'
-    return HTMLResponse(html)
-
-@app.get("/api/restaurants/{restaurant_id}/menu", response_class=HTMLResponse)
-def api_restaurant_menu_options(request: Request, restaurant_id: int):
+    # restaurants are only ever added or deleted; SQLite reuses the highest id after a delete,
+    # so the newest created_at is what tells a replacement row apart
+    etag = make_etag("restaurants", *session.exec(
+        select(func.count(Restaurant.id), func.max(Restaurant.id), func.max(Restaurant.created_at))
+    ).one())
+    if (cached := not_modified(request, etag, OPTIONS_CACHE_CONTROL)) is not None:
+        return cached
+    restaurants = session.exec(select(Restaurant).order_by(Restaurant.name)).all()
+    return templates.TemplateResponse("partials_option_list.html", {
+        "request": request,
+        "restaurants": restaurants,
+    }, headers={"ETag": etag, "Cache-Control": OPTIONS_CACHE_CONTROL})
+
+@app.get("/api/restaurants/{restaurant_id}/menu")
+def api_restaurant_menu_options(request: Request, restaurant_id: int, session: Session = Depends(get_db)):
     """Return <option> tags for menu items of a restaurant."""
-    with get_session() as session:
-        items = session.exec(
-            select(MenuItem).where(MenuItem.restaurant_id == restaurant_id).order_by(MenuItem.name)
-        ).all()
-    html = '<option value="">-- Select a menu item --</option>'
-    for mi in items:
-        price_str = f" (€{mi.price_eur:.2f})" if mi.price_eur is not None else ""
-        html += f'<option value="{mi.id}" data-price="{mi.price_eur if mi.price_eur is not None else ""}" data-name="{mi.name}">{mi.name}{price_str}</option>'
-    html += '<option value="custom">Other (type manually)</option>'
-    return HTMLResponse(html)
+    fingerprint = menu_fingerprint(session, restaurant_id)
+    etag = make_etag("menu", restaurant_id, *fingerprint)
+    if (cached := not_modified(request, etag, OPTIONS_CACHE_CONTROL)) is not None:
+        return cached
+    items = menu_for_restaurant(session, restaurant_id, fingerprint)
+    return templates.TemplateResponse("partials_option_list.html", {
+        "request": request,
+        "menu_items": items,
+    }, headers={"ETag": etag, "Cache-Control": OPTIONS_CACHE_CONTROL})
 
 # ---- Order sessions ----
 
-@app.get("/sessions/new", response_class=HTMLResponse)
-def session_new_page(request: Request):
+@app.get("/sessions/new")
+def session_new_page(request: Request, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user:
-        return RedirectResponse("/login?err=Please+log+in", status_code=302)
+        return redirect("/login", err="Please log in")
     if not user.is_admin:
-        return RedirectResponse("/?err=Only+admins+can+create+sessions", status_code=302)
+        return redirect("/", err="Only admins can create sessions")
 
-    with get_session() as session:
-        restaurants = session.exec(select(Restaurant).order_by(Restaurant.name)).all()
+    restaurants = session.exec(select(Restaurant).order_by(Restaurant.name)).all()
 
     return templates.TemplateResponse("session_new.html", {
         "request": request,
@@ -402,52 +607,49 @@ def session_new(
     restaurant_id: int = Form(...),
     deadline_at: str = Form(...),
     notes: str = Form(""),
+    session: Session = Depends(get_db),
 ):
     user = get_current_user(request)
     if not user:
-        return RedirectResponse("/login?err=Please+log+in", status_code=302)
+        return redirect("/login", err="Please log in")
     if not user.is_admin:
-        return RedirectResponse("/?err=Only+admins+can+create+sessions", status_code=302)
+        return redirect("/", err="Only admins can create sessions")
 
     try:
-        # datetime-local arrives as "YYYY-MM-DDTHH:MM"
-        dt = datetime.fromisoformat(deadline_at)
-    except Exception:
-        return RedirectResponse("/sessions/new?err=Invalid+deadline", status_code=302)
-
-    with get_session() as session:
-        rest = session.get(Restaurant, restaurant_id)
-        if not rest:
-            return RedirectResponse("/sessions/new?err=Restaurant+not+found", status_code=302)
-
-        s = OrderSession(
-            title=title.strip(),
-            restaurant_id=restaurant_id,
-            restaurant=rest.name,
-            restaurant_url=(rest.url or None),
-            deadline_at=dt,
-            notes=(notes.strip() or None),
-            created_by_user_id=user.id,
-            status="open",
-        )
-        session.add(s)
-        session.commit()
-        session.refresh(s)
-
-    return RedirectResponse(f"/sessions/{s.id}?ok=Session+created", status_code=302)
-
-@app.get("/sessions/{session_id}", response_class=HTMLResponse)
-def session_detail(request: Request, session_id: int):
+        dt = parse_deadline(deadline_at)
+    except ValueError:
+        return redirect("/sessions/new", err="Invalid deadline")
+
+    rest = session.get(Restaurant, restaurant_id)
+    if not rest:
+        return redirect("/sessions/new", err="Restaurant not found")
+
+    s = OrderSession(
+        title=title.strip(),
+        restaurant_id=restaurant_id,
+        restaurant=rest.name,
+        restaurant_url=(rest.url or None),
+        deadline_at=dt,
+        notes=(notes.strip() or None),
+        created_by_user_id=user.id,
+        status="open",
+    )
+    session.add(s)
+    session.commit()
+    session.refresh(s)
+
+    return redirect(f"/sessions/{s.id}", ok="Session created")
+
+@app.get("/sessions/{session_id}")
+def session_detail(request: Request, session_id: int, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user:
-        return RedirectResponse("/login?err=Please+log+in", status_code=302)
+        return redirect("/login", err="Please log in")
 
-    with get_session() as session:
-        s = session.get(OrderSession, session_id)
-        if not s:
-            return RedirectResponse("/?err=Session+not+found", status_code=302)
+    s, editable = session_and_editable(session, session_id)
+    if not s:
+        return redirect("/", err="Session not found")
 
-    editable = is_session_editable(s)
     can_close = user.is_admin or (user.id == s.created_by_user_id)
     return templates.TemplateResponse("session_detail.html", {
         "request": request,
@@ -459,50 +661,46 @@ def session_detail(request: Request, session_id: int):
     })
 
 @app.post("/sessions/{session_id}/close")
-def session_close(request: Request, session_id: int):
+def session_close(request: Request, session_id: int, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user:
-        return RedirectResponse("/login?err=Please+log+in", status_code=302)
+        return redirect("/login", err="Please log in")
 
-    with get_session() as session:
-        s = session.get(OrderSession, session_id)
-        if not s:
-            return RedirectResponse("/?err=Session+not+found", status_code=302)
-        if not (user.is_admin or user.id == s.created_by_user_id):
-            return RedirectResponse(f"/sessions/{session_id}?err=Not+allowed", status_code=302)
-        s.status = "closed"
-        s.closed_at = now_utc()
-        session.add(s)
-        session.commit()
+    s = session.get(OrderSession, session_id)
+    if not s:
+        return redirect("/", err="Session not found")
+    if not (user.is_admin or user.id == s.created_by_user_id):
+        return redirect(f"/sessions/{session_id}", err="Not allowed")
+    s.status = "closed"
+    s.closed_at = now_utc()
+    session.add(s)
+    session.commit()
 
-    return RedirectResponse(f"/sessions/{session_id}?ok=Session+closed", status_code=302)
+    return redirect(f"/sessions/{session_id}", ok="Session closed")
 
 # ---- HTMX partials ----
 
-@app.get("/sessions/{session_id}/items/blank", response_class=HTMLResponse)
+@app.get("/sessions/{session_id}/items/blank")
 def item_blank(request: Request, session_id: int):
     user = get_current_user(request)
     if not user:
-        return HTMLResponse("", status_code=401)
-    return HTMLResponse("")
+        return _UNAUTHORIZED_RESPONSE
+    return _EMPTY_RESPONSE
 
-@app.get("/sessions/{session_id}/items/new", response_class=HTMLResponse)
-def item_new_form(request: Request, session_id: int):
+@app.get("/sessions/{session_id}/items/new")
+def item_new_form(request: Request, session_id: int, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user:
-        return HTMLResponse("", status_code=401)
+        return _UNAUTHORIZED_RESPONSE
 
     menu_items = []
-    with get_session() as session:
-        s = session.get(OrderSession, session_id)
-        if not s:
-            return HTMLResponse("Session not found", status_code=404)
-        if not is_session_editable(s):
-            return HTMLResponse("Locked", status_code=400)
-        if s.restaurant_id:
-            menu_items = session.exec(
-                select(MenuItem).where(MenuItem.restaurant_id == s.restaurant_id).order_by(MenuItem.name)
-            ).all()
+    s, editable = session_and_editable(session, session_id)
+    if not s:
+        return HTMLResponse("Session not found", status_code=404)
+    if not editable:
+        return HTMLResponse("Locked", status_code=400)
+    if s.restaurant_id:
+        menu_items = menu_for_restaurant(session, s.restaurant_id)
 
     return templates.TemplateResponse("partials_item_form.html", {
         "request": request,
@@ -515,7 +713,7 @@ def item_new_form(request: Request, session_id: int):
         "flash": None,
     })
 
-@app.post("/sessions/{session_id}/items/new", response_class=HTMLResponse)
+@app.post("/sessions/{session_id}/items/new")
 def item_create(
     request: Request,
     session_id: int,
@@ -524,95 +722,88 @@ def item_create(
     quantity: int = Form(1),
     price_eur: str = Form(""),
     notes: str = Form(""),
+    session: Session = Depends(get_db),
 ):
     user = get_current_user(request)
     if not user:
-        return HTMLResponse("", status_code=401)
+        return _UNAUTHORIZED_RESPONSE
 
-    with get_session() as session:
-        s = session.get(OrderSession, session_id)
-        if not s:
-            return HTMLResponse("Session not found", status_code=404)
-        if not is_session_editable(s):
-            return HTMLResponse("Locked", status_code=400)
-
-        # Resolve item name and price from menu item if selected
-        resolved_name = item_name.strip()
-        price_val = None
-
-        if menu_item_id and menu_item_id not in ("", "custom"):
-            mi = session.get(MenuItem, int(menu_item_id))
-            if mi:
-                resolved_name = mi.name
-                if mi.price_eur is not None:
-                    price_val = mi.price_eur
-
-        if not resolved_name:
+    s, editable = session_and_editable(session, session_id)
+    if not s:
+        return HTMLResponse("Session not found", status_code=404)
+    if not editable:
+        return HTMLResponse("Locked", status_code=400)
+
+    # Resolve item name and price from menu item if selected
+    resolved_name = item_name.strip()
+    price_val = None
+
+    if menu_item_id and menu_item_id not in ("", "custom"):
+        mi = session.get(MenuItem, int(menu_item_id))
+        if mi:
+            resolved_name = mi.name
+            if mi.price_eur is not None:
+                price_val = mi.price_eur
+
+    if not resolved_name:
+        menu_items = []
+        if s.restaurant_id:
+            menu_items = menu_for_restaurant(session, s.restaurant_id)
+        return templates.TemplateResponse("partials_item_form.html", {
+            "request": request, "current_user": user, "session_id": session_id,
+            "item": None, "menu_items": menu_items,
+            "action": f"/sessions/{session_id}/items/new",
+            "error": "Please select a menu item or type an item name.",
+            "flash": None
+        })
+
+    # Override price if user typed one
+    if price_eur.strip():
+        try:
+            price_val = parse_price(price_eur)
+        except ValueError:
             menu_items = []
             if s.restaurant_id:
-                menu_items = session.exec(
-                    select(MenuItem).where(MenuItem.restaurant_id == s.restaurant_id).order_by(MenuItem.name)
-                ).all()
+                menu_items = menu_for_restaurant(session, s.restaurant_id)
             return templates.TemplateResponse("partials_item_form.html", {
                 "request": request, "current_user": user, "session_id": session_id,
                 "item": None, "menu_items": menu_items,
                 "action": f"/sessions/{session_id}/items/new",
-                "error": "Please select a menu item or type an item name.",
+                "error": "Price must be a number (e.g., 9.50).",
                 "flash": None
             })
 
-        # Override price if user typed one
-        if price_eur.strip():
-            try:
-                price_val = float(price_eur)
-            except Exception:
-                menu_items = []
-                if s.restaurant_id:
-                    menu_items = session.exec(
-                        select(MenuItem).where(MenuItem.restaurant_id == s.restaurant_id).order_by(MenuItem.name)
-                    ).all()
-                return templates.TemplateResponse("partials_item_form.html", {
-                    "request": request, "current_user": user, "session_id": session_id,
-                    "item": None, "menu_items": menu_items,
-                    "action": f"/sessions/{session_id}/items/new",
-                    "error": "Price must be a number (e.g., 9.50).",
-                    "flash": None
-                })
-
-        item = OrderItem(
-            session_id=session_id,
-            user_id=user.id,
-            item_name=resolved_name,
-            quantity=max(1, int(quantity)),
-            price_eur=price_val,
-            notes=(notes.strip() or None),
-        )
-        session.add(item)
-        session.commit()
-
-    # Clear form + trigger table refresh
-    return HTMLResponse('<div class="muted">Added ✓</div><script>htmx.trigger("#items-table","refresh");htmx.trigger("#summary","refresh");htmx.trigger("#order-text","refresh");</script>')
-
-@app.get("/sessions/{session_id}/items/{item_id}/edit", response_class=HTMLResponse)
-def item_edit_form(request: Request, session_id: int, item_id: int):
+    item = OrderItem(
+        session_id=session_id,
+        user_id=user.id,
+        item_name=resolved_name,
+        quantity=max(1, int(quantity)),
+        price_eur=price_val,
+        notes=(notes.strip() or None),
+    )
+    session.add(item)
+    session.commit()
+
+    # Clear form + let the session page reload its partials
+    return HTMLResponse('<div class="muted">Added ✓</div>', headers={"HX-Trigger": "refresh"})
+
+@app.get("/sessions/{session_id}/items/{item_id}/edit")
+def item_edit_form(request: Request, session_id: int, item_id: int, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user:
-        return HTMLResponse("", status_code=401)
+        return _UNAUTHORIZED_RESPONSE
 
     menu_items = []
-    with get_session() as session:
-        s = session.get(OrderSession, session_id)
-        item = session.get(OrderItem, item_id)
-        if not s or not item or item.session_id != session_id:
-            return HTMLResponse("Not found", status_code=404)
-        if not is_session_editable(s):
-            return HTMLResponse("Locked", status_code=400)
-        if not (user.is_admin or item.user_id == user.id):
-            return HTMLResponse("Not allowed", status_code=403)
-        if s.restaurant_id:
-            menu_items = session.exec(
-                select(MenuItem).where(MenuItem.restaurant_id == s.restaurant_id).order_by(MenuItem.name)
-            ).all()
+    s, editable = session_and_editable(session, session_id)
+    item = session.get(OrderItem, item_id)
+    if not s or not item or item.session_id != session_id:
+        return HTMLResponse("Not found", status_code=404)
+    if not editable:
+        return HTMLResponse("Locked", status_code=400)
+    if not (user.is_admin or item.user_id == user.id):
+        return HTMLResponse("Not allowed", status_code=403)
+    if s.restaurant_id:
+        menu_items = menu_for_restaurant(session, s.restaurant_id)
 
     return templates.TemplateResponse("partials_item_form.html", {
         "request": request,
@@ -625,7 +816,7 @@ def item_edit_form(request: Request, session_id: int, item_id: int):
         "flash": None,
     })
 
-@app.post("/sessions/{session_id}/items/{item_id}/edit", response_class=HTMLResponse)
+@app.post("/sessions/{session_id}/items/{item_id}/edit")
 def item_edit(
     request: Request,
     session_id: int,
@@ -634,217 +825,366 @@ def item_edit(
     quantity: int = Form(1),
     price_eur: str = Form(""),
     notes: str = Form(""),
+    session: Session = Depends(get_db),
 ):
     user = get_current_user(request)
     if not user:
-        return HTMLResponse("", status_code=401)
+        return _UNAUTHORIZED_RESPONSE
 
-    with get_session() as session:
-        s = session.get(OrderSession, session_id)
-        item = session.get(OrderItem, item_id)
-        if not s or not item or item.session_id != session_id:
-            return HTMLResponse("Not found", status_code=404)
-        if not is_session_editable(s):
-            return HTMLResponse("Locked", status_code=400)
-        if not (user.is_admin or item.user_id == user.id):
-            return HTMLResponse("Not allowed", status_code=403)
-
-        price_val = None
-        if price_eur.strip():
-            try:
-                price_val = float(price_eur)
-            except Exception:
-                return templates.TemplateResponse("partials_item_form.html", {
-                    "request": request, "current_user": user, "session_id": session_id,
-                    "item": item, "action": f"/sessions/{session_id}/items/{item_id}/edit",
-                    "error": "Price must be a number (e.g., 9.50).",
-                    "flash": None
-                })
-
-        item.item_name = item_name.strip()
-        item.quantity = max(1, int(quantity))
-        item.price_eur = price_val
-        item.notes = (notes.strip() or None)
-        item.updated_at = now_utc()
-        session.add(item)
-        session.commit()
+    s, editable = session_and_editable(session, session_id)
+    item = session.get(OrderItem, item_id)
+    if not s or not item or item.session_id != session_id:
+        return HTMLResponse("Not found", status_code=404)
+    if not editable:
+        return HTMLResponse("Locked", status_code=400)
+    if not (user.is_admin or item.user_id == user.id):
+        return HTMLResponse("Not allowed", status_code=403)
+
+    price_val = None
+    if price_eur.strip():
+        try:
+            price_val = parse_price(price_eur)
+        except ValueError:
+            return templates.TemplateResponse("partials_item_form.html", {
+                "request": request, "current_user": user, "session_id": session_id,
+                "item": item, "action": f"/sessions/{session_id}/items/{item_id}/edit",
+                "error": "Price must be a number (e.g., 9.50).",
+                "flash": None
+            })
+
+    item.item_name = item_name.strip()
+    item.quantity = max(1, int(quantity))
+    item.price_eur = price_val
+    item.notes = (notes.strip() or None)
+    item.updated_at = now_utc()
+    session.add(item)
+    session.commit()
 
-    return HTMLResponse('<div class="muted">Saved ✓</div><script>htmx.trigger("#items-table","refresh");htmx.trigger("#summary","refresh");htmx.trigger("#order-text","refresh");</script>')
+    return HTMLResponse('<div class="muted">Saved ✓</div>', headers={"HX-Trigger": "refresh"})
 
-@app.post("/sessions/{session_id}/items/{item_id}/delete", response_class=HTMLResponse)
-def item_delete(request: Request, session_id: int, item_id: int):
+@app.post("/sessions/{session_id}/items/{item_id}/delete")
+def item_delete(request: Request, session_id: int, item_id: int, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user:
-        return HTMLResponse("", status_code=401)
+        return _UNAUTHORIZED_RESPONSE
+
+    s, editable = session_and_editable(session, session_id)
+    item = session.get(OrderItem, item_id)
+    if not s or not item or item.session_id != session_id:
+        return HTMLResponse("Not found", status_code=404)
+    if not editable:
+        return HTMLResponse("Locked", status_code=400)
+    if not (user.is_admin or item.user_id == user.id):
+        return HTMLResponse("Not allowed", status_code=403)
+
+    session.delete(item)
+    session.commit()
+
+    return HTMLResponse('<div class="muted">Deleted ✓</div>', headers={"HX-Trigger": "refresh"})
+
+def fetch_items_with_users(session, session_id: int) -> list[OrderItem]:
+    # one joined query fills item.user; outer join so items of since-deleted users are still listed
+    return session.exec(
+        select(OrderItem)
+        .outerjoin(OrderItem.user)
+        .options(contains_eager(OrderItem.user))
+        .where(OrderItem.session_id == session_id)
+        .order_by(OrderItem.created_at.asc())
+    ).all()
+
+def build_item_rows(editable: bool, items: list[OrderItem], user: User) -> list[dict]:
+    rows = []
+    for it in items:
+        can_edit = editable and (user.is_admin or it.user_id == user.id)
+        rows.append({"item": it, "can_edit": can_edit})
+    return rows
+
+def build_summary(session, session_id: int) -> dict:
+    # labeled rows go straight to the template; no per-person dicts
+    totals = session.exec(
+        select(
+            User.full_name,
+            User.email,
+            func.sum(OrderItem.quantity).label("item_count"),
+            func.coalesce(func.sum(OrderItem.quantity * OrderItem.price_eur), 0.0).label("subtotal"),
+        )
+        .join(OrderItem, OrderItem.user_id == User.id)
+        .where(OrderItem.session_id == session_id)
+        .group_by(User.id)
+        .order_by(func.lower(User.full_name))
+    ).all()
 
-    with get_session() as session:
-        s = session.get(OrderSession, session_id)
-        item = session.get(OrderItem, item_id)
-        if not s or not item or item.session_id != session_id:
-            return HTMLResponse("Not found", status_code=404)
-        if not is_session_editable(s):
-            return HTMLResponse("Locked", status_code=400)
-        if not (user.is_admin or item.user_id == user.id):
-            return HTMLResponse("Not allowed", status_code=403)
-
-        session.delete(item)
-        session.commit()
+    return {
+        "totals": totals,
+        "grand_total": sum(t.subtotal for t in totals),
+        "grand_count": sum(t.item_count for t in totals),
+    }
+
+def items_stamp(session, session_id: int) -> tuple[int, datetime | None]:
+    """(item count, latest updated_at) for a session; changes whenever its items do."""
+    return tuple(session.exec(
+        select(func.count(OrderItem.id), func.max(OrderItem.updated_at)).where(OrderItem.session_id == session_id)
+    ).one())
+
+def _order_line(row) -> str:
+    if row.quantity == 1 and not row.notes:
+        return "  - " + row.item_name  # the usual case: one of an item, no notes
+    qty = f"{row.quantity}x " if row.quantity != 1 else ""
+    note = f" ({row.notes})" if row.notes else ""
+    return f"  - {qty}{row.item_name}{note}"
+
+def _order_person():
+    # the user's name, or "User <id>" for items whose user no longer exists; the constant is
+    # inlined (not a bind parameter) so GROUP BY / ORDER BY repeat the exact SELECT expression
+    return func.coalesce(User.full_name, literal_column("'User '") + cast(OrderItem.user_id, String)).label("person")
+
+def order_text_rows(session, session_id: int, limit: int | None = None, offset: int = 0) -> list:
+    """Just the columns the order text needs, sorted by person and then item order."""
+    person = _order_person()
+    stmt = (
+        select(person, OrderItem.item_name, OrderItem.quantity, OrderItem.notes)
+        .outerjoin(User, User.id == OrderItem.user_id)
+        .where(OrderItem.session_id == session_id)
+        .order_by(func.lower(person), person, OrderItem.created_at.asc())
+    )
+    if offset:
+        stmt = stmt.offset(offset)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return session.exec(stmt).all()
+
+def order_text_groups(session, session_id: int, limit: int | None = None, offset: int = 0):
+    """(person, lines) pairs in output order; limit/offset page over items, not people."""
+    if limit is None and not offset and session.get_bind().dialect.name == "postgresql":
+        # Postgres formats and concatenates each person's lines itself: one row per person
+        person = _order_person()
+        qty = case((OrderItem.quantity != 1, cast(OrderItem.quantity, String) + "x "), else_="")
+        note = func.coalesce(" (" + func.nullif(OrderItem.notes, "") + ")", "")
+        lines = func.string_agg(
+            literal("  - ") + qty + OrderItem.item_name + note,
+            aggregate_order_by(literal("\n"), OrderItem.created_at.asc()),
+        )
+        rows = session.exec(
+            select(person, lines)
+            .outerjoin(User, User.id == OrderItem.user_id)
+            .where(OrderItem.session_id == session_id)
+            .group_by(person)
+            .order_by(func.lower(person), person)
+        ).all()
+        return [(name, (text,)) for name, text in rows]
+    return (
+        (name, map(_order_line, group))
+        for name, group in itertools.groupby(
+            order_text_rows(session, session_id, limit, offset), key=attrgetter("person")
+        )
+    )
 
-    return HTMLResponse('<div class="muted">Deleted ✓</div><script>htmx.trigger("#items-table","refresh");htmx.trigger("#summary","refresh");htmx.trigger("#order-text","refresh");</script>')
+def build_order_text(s: OrderSession, groups) -> str:
+    # Build a concise order text grouped by person
+    header = (
+        f"{s.title} — {s.restaurant}",
+        f"Deadline: {fmt_dt(s.deadline_at)} | Status: {s.status}",
+        "",
+    )
+    body = itertools.chain.from_iterable((f"{person}:", *lines, "") for person, lines in groups)
+    return "\n".join(itertools.chain(header, body)).strip()
+
+# (session_id, status, item count, latest updated_at) -> rendered order text
+_order_text_cache: TTLCache = TTLCache(maxsize=256, ttl=300)
+_order_text_lock = threading.Lock()
+
+def cached_order_text(
+    session, s: OrderSession, stamp: tuple[int, datetime | None], limit: int | None = None, offset: int = 0
+) -> str:
+    # polls between edits are served from the cache without loading any items
+    key = (s.id, s.status, *stamp, limit, offset)
+    with _order_text_lock:
+        text = _order_text_cache.get(key)
+    if text is None:
+        text = build_order_text(s, order_text_groups(session, s.id, limit, offset))
+        with _order_text_lock:
+            _order_text_cache[key] = text
+    return text
+
+# session fragments must be revalidated on every poll; the ETag makes that cheap
+FRAGMENT_CACHE_CONTROL = "private, no-cache"
+
+@app.get("/sessions/{session_id}/refresh")
+def session_refresh(request: Request, session_id: int, session: Session = Depends(get_db)):
+    """Items table, summary and order text in one response, swapped in out-of-band."""
+    user = get_current_user(request)
+    if not user:
+        return _UNAUTHORIZED_RESPONSE
+
+    s, editable = session_and_editable(session, session_id)
+    if not s:
+        return HTMLResponse("Not found", status_code=404)
+    # most polls find nothing new and end here with a 304
+    stamp = items_stamp(session, session_id)
+    etag = make_etag("refresh", session_id, s.status, editable, user.id, user.is_admin, *stamp)
+    if (cached := not_modified(request, etag, FRAGMENT_CACHE_CONTROL)) is not None:
+        return cached
+    items = fetch_items_with_users(session, session_id)
+    summary = build_summary(session, session_id)
+
+    return templates.TemplateResponse("partials_session_refresh.html", {
+        "request": request,
+        "current_user": user,
+        "session_id": session_id,
+        "rows": build_item_rows(editable, items, user),
+        **summary,
+        "text": cached_order_text(session, s, stamp),
+        "flash": None,
+    }, headers={"ETag": etag, "Cache-Control": FRAGMENT_CACHE_CONTROL})
 
-@app.get("/sessions/{session_id}/items/table", response_class=HTMLResponse)
-def items_table(request: Request, session_id: int):
+@app.get("/sessions/{session_id}/items/table")
+def items_table(request: Request, session_id: int, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user:
-        return HTMLResponse("", status_code=401)
+        return _UNAUTHORIZED_RESPONSE
 
-    with get_session() as session:
-        s = session.get(OrderSession, session_id)
-        if not s:
-            return HTMLResponse("Not found", status_code=404)
-        items = session.exec(select(OrderItem).where(OrderItem.session_id == session_id).order_by(OrderItem.created_at.asc())).all()
-        # fetch users in one go
-        user_ids = sorted({i.user_id for i in items})
-        users = {}
-        if user_ids:
-            rows_u = session.exec(select(User).where(User.id.in_(user_ids))).all()
-            users = {u.id: u for u in rows_u}
-
-    editable = is_session_editable(s)
-    rows = []
-    for it in items:
-        u = users.get(it.user_id)
-        can_edit = editable and (user.is_admin or it.user_id == user.id)
-        rows.append({"item": it, "user": u, "can_edit": can_edit})
+    s, editable = session_and_editable(session, session_id)
+    if not s:
+        return HTMLResponse("Not found", status_code=404)
+    etag = make_etag("table", session_id, editable, user.id, user.is_admin, *items_stamp(session, session_id))
+    if (cached := not_modified(request, etag, FRAGMENT_CACHE_CONTROL)) is not None:
+        return cached
+    items = fetch_items_with_users(session, session_id)
 
     return templates.TemplateResponse("partials_items_table.html", {
         "request": request,
         "current_user": user,
         "session_id": session_id,
-        "rows": rows,
+        "rows": build_item_rows(editable, items, user),
         "flash": None,
-    })
+    }, headers={"ETag": etag, "Cache-Control": FRAGMENT_CACHE_CONTROL})
 
-@app.get("/sessions/{session_id}/summary", response_class=HTMLResponse)
-def summary_partial(request: Request, session_id: int):
+@app.get("/sessions/{session_id}/summary")
+def summary_partial(request: Request, session_id: int, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user:
-        return HTMLResponse("", status_code=401)
+        return _UNAUTHORIZED_RESPONSE
 
-    with get_session() as session:
-        items = session.exec(select(OrderItem).where(OrderItem.session_id == session_id)).all()
-        user_ids = sorted({i.user_id for i in items})
-        users = {}
-        if user_ids:
-            rows_u = session.exec(select(User).where(User.id.in_(user_ids))).all()
-            users = {u.id: u for u in rows_u}
-
-    totals_map = {}
-    for it in items:
-        u = users.get(it.user_id)
-        if not u:
-            continue
-        key = u.id
-        if key not in totals_map:
-            totals_map[key] = {"full_name": u.full_name, "email": u.email, "count": 0, "subtotal": 0.0}
-        totals_map[key]["count"] += int(it.quantity)
-        if it.price_eur is not None:
-            totals_map[key]["subtotal"] += float(it.price_eur) * int(it.quantity)
-
-    totals = list(totals_map.values())
-    totals.sort(key=lambda x: x["full_name"].lower())
-
-    grand_total = sum(t["subtotal"] for t in totals)
-    grand_count = sum(t["count"] for t in totals)
+    summary = build_summary(session, session_id)
 
     return templates.TemplateResponse("partials_summary.html", {
         "request": request,
         "current_user": user,
-        "totals": totals,
-        "grand_total": grand_total,
-        "grand_count": grand_count,
+        **summary,
         "flash": None,
     })
 
-@app.get("/sessions/{session_id}/order_text", response_class=HTMLResponse)
-def order_text_partial(request: Request, session_id: int):
+@app.api_route("/sessions/{session_id}/order_text", methods=["GET", "HEAD"])
+def order_text_partial(
+    request: Request,
+    session_id: int,
+    limit: int | None = Query(None, ge=1, le=10000),
+    offset: int = Query(0, ge=0),
+    session: Session = Depends(get_db),
+):
     user = get_current_user(request)
     if not user:
-        return HTMLResponse("", status_code=401)
-
-    with get_session() as session:
-        s = session.get(OrderSession, session_id)
-        if not s:
-            return HTMLResponse("Not found", status_code=404)
-        items = session.exec(select(OrderItem).where(OrderItem.session_id == session_id).order_by(OrderItem.created_at.asc())).all()
-        user_ids = sorted({i.user_id for i in items})
-        users = {}
-        if user_ids:
-            rows_u = session.exec(select(User).where(User.id.in_(user_ids))).all()
-            users = {u.id: u for u in rows_u}
-
-    # Build a concise order text grouped by person
-    by_person = {}
-    for it in items:
-        u = users.get(it.user_id)
-        name = u.full_name if u else f"User {it.user_id}"
-        by_person.setdefault(name, []).append(it)
-
-    lines = []
-    lines.append(f"{s.title} — {s.restaurant}")
-    lines.append(f"Deadline: {fmt_dt(s.deadline_at)} | Status: {s.status}")
-    lines.append("")
-    for person in sorted(by_person.keys(), key=lambda x: x.lower()):
-        lines.append(f"{person}:")
-        for it in by_person[person]:
-            note = f" ({it.notes})" if it.notes else ""
-            qty = f"{it.quantity}x " if it.quantity != 1 else ""
-            lines.append(f"  - {qty}{it.item_name}{note}")
-        lines.append("")
-    text = "\n".join(lines).strip()
+        return _UNAUTHORIZED_RESPONSE
+
+    s = session.get(OrderSession, session_id)
+    if not s:
+        return HTMLResponse("Not found", status_code=404)
+
+    stamp = items_stamp(session, session_id)
+    cache_control = export_cache_control(s)
+    etag = make_etag("text", session_id, s.status, *stamp, limit, offset)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if limit is not None:
+        # optional paging over items for very large sessions; stamp[0] is the item count
+        links = []
+        if offset + limit < stamp[0]:
+            links.append(f'</sessions/{session_id}/order_text?limit={limit}&offset={offset + limit}>; rel="next"')
+        if offset:
+            links.append(f'</sessions/{session_id}/order_text?limit={limit}&offset={max(0, offset - limit)}>; rel="prev"')
+        if links:
+            headers["Link"] = ", ".join(links)
+    if (cached := not_modified(request, etag, cache_control)) is not None:
+        return cached
+    if request.method == "HEAD":
+        # change polls only need the ETag; skip the item select and rendering
+        return Response(headers=headers)
 
     return templates.TemplateResponse("partials_order_text.html", {
         "request": request,
         "current_user": user,
-        "text": text,
+        "text": cached_order_text(session, s, stamp, limit, offset),
         "flash": None,
-    })
+    }, headers=headers)
+
+def export_cache_control(s: OrderSession) -> str:
+    # a closed session's items can no longer change, so its exports may be kept for a day
+    return "private, max-age=86400" if s.status == "closed" else FRAGMENT_CACHE_CONTROL
+
+def _csvq(value: str) -> str:
+    # same minimal quoting as csv.writer, without its per-row list and per-field dispatch
+    if "," in value or '"' in value or "\n" in value or "\r" in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+def _csv_item_line(row) -> str:
+    # name/email arrive as '' (not NULL) for items of deleted users, so only price and notes branch
+    full_name, email, item_name, quantity, price_eur, notes = row
+    price = format(price_eur, ".2f") if price_eur is not None else ""
+    return f"{_csvq(full_name)},{_csvq(email)},{_csvq(item_name)},{quantity},{price},{_csvq(notes) if notes else ''}\r\n"
 
 @app.get("/sessions/{session_id}/export.csv")
-def export_csv(request: Request, session_id: int):
+def export_csv(request: Request, session_id: int, session: Session = Depends(get_db)):
     user = get_current_user(request)
     if not user:
-        return RedirectResponse("/login?err=Please+log+in", status_code=302)
-
-    with get_session() as session:
-        s = session.get(OrderSession, session_id)
-        if not s:
-            return RedirectResponse("/?err=Session+not+found", status_code=302)
-        items = session.exec(select(OrderItem).where(OrderItem.session_id == session_id).order_by(OrderItem.created_at.asc())).all()
-        user_ids = sorted({i.user_id for i in items})
-        users = {}
-        if user_ids:
-            rows_u = session.exec(select(User).where(User.id.in_(user_ids))).all()
-            users = {u.id: u for u in rows_u}
-
-    buf = StringIO()
-    w = csv.writer(buf)
-    w.writerow(["session_id", "session_title", "restaurant", "deadline_at", "status"])
-    w.writerow([s.id, s.title, s.restaurant, fmt_dt(s.deadline_at), s.status])
-    w.writerow([])
-    w.writerow(["person_name", "person_email", "item_name", "quantity", "price_eur", "notes"])
-    for it in items:
-        u = users.get(it.user_id)
-        w.writerow([
-            (u.full_name if u else ""),
-            (u.email if u else ""),
-            it.item_name,
-            it.quantity,
-            (f"{it.price_eur:.2f}" if it.price_eur is not None else ""),
-            (it.notes or ""),
-        ])
-
-    data = buf.getvalue().encode("utf-8")
-    return Response(content=data, media_type="text/csv", headers={
-        "Content-Disposition": f'attachment; filename="order_session_{session_id}.csv"'
+        return redirect("/login", err="Please log in")
+
+    s = session.get(OrderSession, session_id)
+    if not s:
+        return redirect("/", err="Session not found")
+
+    cache_control = export_cache_control(s)
+    etag = make_etag("csv", session_id, s.status, *items_stamp(session, session_id))
+    if (cached := not_modified(request, etag, cache_control)) is not None:
+        return cached
+
+    def iter_csv():
+        # csv.writer only for the fixed header block; item rows are formatted by _csv_item_line
+        buf = StringIO()
+        w = csv.writer(buf)
+
+        def flush() -> str:
+            data = buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+            return data
+
+        w.writerow(["session_id", "session_title", "restaurant", "deadline_at", "status"])
+        w.writerow([s.id, s.title, s.restaurant, fmt_dt(s.deadline_at), s.status])
+        w.writerow([])
+        w.writerow(["person_name", "person_email", "item_name", "quantity", "price_eur", "notes"])
+        yield flush()
+
+        with get_session() as session:
+            items = session.exec(
+                select(
+                    func.coalesce(User.full_name, ""),
+                    func.coalesce(User.email, ""),
+                    OrderItem.item_name,
+                    OrderItem.quantity,
+                    OrderItem.price_eur,
+                    OrderItem.notes,
+                )
+                .outerjoin(User, User.id == OrderItem.user_id)
+                .where(OrderItem.session_id == session_id)
+                .order_by(OrderItem.created_at.asc())
+                .execution_options(yield_per=500)
+            )
+            # one chunk per fetched batch: a single ASGI send per 500 rows instead of per row
+            for batch in items.partitions():
+                yield "".join(map(_csv_item_line, batch))
+
+    return StreamingResponse(iter_csv(), media_type="text/csv", headers={
+        "Content-Disposition": f'attachment; filename="order_session_{session_id}.csv"',
+        "ETag": etag,
+        "Cache-Control": cache_control,
     })
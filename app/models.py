@@ -1,14 +1,21 @@
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Index, func
 from sqlmodel import SQLModel, Field, Relationship
 
+def _timestamp_field():
+    # Python fills the value on ORM inserts (microsecond precision, same clock as now_utc);
+    # the server default covers bulk/Core inserts that leave the column out.
+    return Field(default_factory=datetime.utcnow, sa_column_kwargs={"server_default": func.now()})
+
+
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     email: str = Field(index=True, unique=True)
     full_name: str
     password_hash: str
     is_admin: bool = False
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = _timestamp_field()
 
     items: list["OrderItem"] = Relationship(back_populates="user")
 
@@ -17,17 +24,20 @@ class Restaurant(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True, unique=True)
     url: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = _timestamp_field()
 
     menu_items: list["MenuItem"] = Relationship(back_populates="restaurant", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
 
 
 class MenuItem(SQLModel, table=True):
+    # menus are always listed per restaurant, ordered by name
+    __table_args__ = (Index("ix_menuitem_restaurant_name", "restaurant_id", "name"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    restaurant_id: int = Field(foreign_key="restaurant.id", index=True)
+    restaurant_id: int = Field(foreign_key="restaurant.id")
     name: str
     price_eur: Optional[float] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = _timestamp_field()
 
     restaurant: Restaurant = Relationship(back_populates="menu_items")
 
@@ -43,15 +53,18 @@ class OrderSession(SQLModel, table=True):
     deadline_at: datetime
     status: str = "open"  # open | closed
     created_by_user_id: int = Field(foreign_key="user.id")
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = _timestamp_field()
     closed_at: Optional[datetime] = None
 
     items: list["OrderItem"] = Relationship(back_populates="session")
 
 
 class OrderItem(SQLModel, table=True):
+    # every partial filters by session and orders by creation time
+    __table_args__ = (Index("ix_orderitem_session_created", "session_id", "created_at"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    session_id: int = Field(foreign_key="ordersession.id", index=True)
+    session_id: int = Field(foreign_key="ordersession.id")  # indexed by ix_orderitem_session_created
     user_id: int = Field(foreign_key="user.id", index=True)
 
     item_name: str
@@ -59,8 +72,10 @@ class OrderItem(SQLModel, table=True):
     price_eur: Optional[float] = None
     notes: Optional[str] = None
 
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = _timestamp_field()
+    updated_at: datetime = _timestamp_field()
 
-    session: OrderSession = Relationship(back_populates="items")
-    user: User = Relationship(back_populates="items")
+    # Never lazy-load these per row: list queries fill item.user via a join
+    # (contains_eager), and an unplanned per-item SELECT fails loudly instead.
+    session: OrderSession = Relationship(back_populates="items", sa_relationship_kwargs={"lazy": "raise_on_sql"})
+    user: User = Relationship(back_populates="items", sa_relationship_kwargs={"lazy": "raise_on_sql"})
@@ -1,13 +1,27 @@
 from __future__ import annotations
 from datetime import datetime, timezone
+from functools import lru_cache
 
 def now_utc() -> datetime:
     return datetime.now(timezone.utc).replace(tzinfo=None)
 
+def parse_price(raw: str) -> float:
+    """Parse a price form field such as "9.50"; raises ValueError if it isn't a number."""
+    return float(raw.strip())
+
+def parse_deadline(raw: str) -> datetime:
+    """Parse a datetime-local form field ("YYYY-MM-DDTHH:MM"); raises ValueError if invalid."""
+    return datetime.fromisoformat(raw.strip())
+
+# Templates format the same deadlines and prices over and over (one per row), so
+# the pure formatters below remember their recent results.
+
+@lru_cache(maxsize=4096)
 def fmt_dt(dt: datetime) -> str:
     # Render in a human-friendly format (server local time)
     return dt.strftime("%Y-%m-%d %H:%M")
 
+@lru_cache(maxsize=4096)
 def euro(v: float | None) -> str:
     if v is None:
         return "-"
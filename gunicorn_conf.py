@@ -0,0 +1,34 @@
+"""gunicorn settings for production: several uvicorn workers forked from one master.
+
+    gunicorn -c gunicorn_conf.py app.main:app
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn_worker.UvicornWorker"
+
+
+def _default_workers() -> int:
+    # 2 x usable cores + 1; the affinity mask reflects cpusets, but is Linux-only
+    if hasattr(os, "sched_getaffinity"):
+        cores = len(os.sched_getaffinity(0))
+    else:
+        cores = os.cpu_count() or 1
+    return 2 * cores + 1
+
+
+# Each worker holds its own copy of the app plus HASH_CONCURRENCY x 64 MiB for Argon2, so
+# memory-capped containers should set WEB_CONCURRENCY (render.yaml and the Dockerfile do).
+workers = int(os.getenv("WEB_CONCURRENCY") or _default_workers())
+# import the app (and compile its templates) once in the master; workers share it copy-on-write
+preload_app = True
+
+
+def on_starting(server):
+    # schema + bootstrap admin run once here rather than concurrently in every worker
+    from app.db import engine
+    from app.main import bootstrap
+
+    bootstrap()
+    # don't hand the master's SQLite connections to forked workers
+    engine.dispose()